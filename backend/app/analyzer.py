@@ -1,9 +1,13 @@
+import asyncio
 import re
-import socket
 from email import policy
 from email.parser import BytesParser
-from typing import Dict, List, Tuple
+from functools import lru_cache
+from typing import Dict, List, NamedTuple, Optional, Tuple, Union
 
+import dns.asyncresolver
+import dns.resolver
+from cachetools import TTLCache
 from pydantic import BaseModel
 
 
@@ -13,6 +17,20 @@ class RuleResult(BaseModel):
     info: str
 
 
+# Scorers return plain tuples; they only become RuleResult models in the response.
+class Rule(NamedTuple):
+    name: str
+    points: int
+    info: str
+
+
+# Rules whose content never varies are shared rather than rebuilt per email.
+_ALL_CAPS_SUBJECT = Rule(name="ALL_CAPS_SUBJECT", points=8, info="Subject is all capital letters")
+_SPF_FAIL = Rule(name="SPF_FAIL", points=12, info="SPF validation failed")
+_NO_DKIM = Rule(name="NO_DKIM", points=15, info="Missing DKIM signature")
+_DMARC_FAIL = Rule(name="DMARC_FAIL", points=10, info="DMARC validation failed")
+
+
 SPAM_KEYWORDS = [
     "viagra",
     "lottery",
@@ -26,12 +44,24 @@ SPAM_KEYWORDS = [
 ]
 
 
-DNSBL_SAMPLE = {"127.0.0.2", "127.0.0.3"}
-DISPOSABLE_DOMAINS = {"mailinator.com", "tempmail.com", "10minutemail.com"}
+PARSE_CACHE_SIZE = 256
+PARSE_CACHE_MAX_RAW_LENGTH = 64 * 1024
+MAX_BODY_CHARS = 1_000_000
+DNS_CACHE_SIZE = 10_000
+DNS_CACHE_TTL = 3600
+DNS_NEGATIVE_CACHE_TTL = 300
+MAX_BATCH_SIZE = 100
+BATCH_CONCURRENCY = 10
+
+
+DNSBL_SAMPLE = frozenset({"127.0.0.2", "127.0.0.3"})
+DISPOSABLE_DOMAINS = frozenset({"mailinator.com", "tempmail.com", "10minutemail.com"})
 
 
 URL_REGEX = re.compile(r"https?://[^\s<>]+", re.IGNORECASE)
 HEADER_REGEX = re.compile(r"^[\w-]+:", re.MULTILINE)
+DOCTYPE_REGEX = re.compile(r"<!doctype", re.IGNORECASE)
+SUSPICIOUS_URL_HINTS = ("bit.ly", "tinyurl", "click")
 
 
 class AnalysisResult(BaseModel):
@@ -42,62 +72,92 @@ class AnalysisResult(BaseModel):
     headers: Dict[str, str]
 
 
-def parse_email(raw: str):
+class BatchItem(BaseModel):
+    index: int
+    result: Optional[AnalysisResult] = None
+    error: Optional[str] = None
+
+
+def parse_email(raw: Union[str, bytes]):
+    # Small inputs are cached so re-submitted emails skip the parser; large ones are
+    # always parsed fresh so the cache stays bounded (about PARSE_CACHE_SIZE *
+    # PARSE_CACHE_MAX_RAW_LENGTH of input plus the parsed trees). Cached messages are
+    # shared between callers and must not be mutated.
+    if len(raw) > PARSE_CACHE_MAX_RAW_LENGTH:
+        return _parse_email(raw)
+    return _parse_email_cached(raw)
+
+
+def _parse_email(raw: Union[str, bytes]):
     try:
-        message = BytesParser(policy=policy.default).parsebytes(raw.encode())
+        # Bytes are parsed as-is; str input is encoded because Parser.parsestr
+        # mis-decodes 8-bit bodies that declare a charset.
+        if isinstance(raw, str):
+            raw = raw.encode()
+        message = BytesParser(policy=policy.default).parsebytes(raw)
     except Exception as exc:  # pragma: no cover - error converted downstream
         raise ValueError(f"Failed to parse email: {exc}") from exc
     return message
 
 
+_parse_email_cached = lru_cache(maxsize=PARSE_CACHE_SIZE)(_parse_email)
+
+
 def extract_body(message) -> Tuple[str, str]:
     plain_parts: List[str] = []
     html_parts: List[str] = []
+    budget = MAX_BODY_CHARS
 
-    if message.is_multipart():
-        for part in message.walk():
-            content_type = part.get_content_type()
-            if content_type == "text/plain":
-                plain_parts.append(part.get_content())
-            elif content_type == "text/html":
-                html_parts.append(part.get_content())
-    else:
-        content_type = message.get_content_type()
+    # walk() yields the message itself when it is not multipart.
+    for part in message.walk():
+        if part.is_multipart():
+            continue
+        content_type = part.get_content_type()
         if content_type == "text/plain":
-            plain_parts.append(message.get_content())
+            parts = plain_parts
         elif content_type == "text/html":
-            html_parts.append(message.get_content())
+            parts = html_parts
+        else:
+            continue
+        # Text beyond MAX_BODY_CHARS in total is dropped to bound work on huge emails.
+        content = part.get_content()[:budget]
+        parts.append(content)
+        budget -= len(content)
+        if budget <= 0:
+            break
 
     return "\n".join(plain_parts), "\n".join(html_parts)
 
 
-def score_keywords(text: str) -> List[RuleResult]:
+def score_keywords(text: str) -> List[Rule]:
     lowered = text.lower()
     found = [kw for kw in SPAM_KEYWORDS if kw in lowered]
     if not found:
         return []
     points = 10 + 2 * len(found)
-    return [RuleResult(name="SPAM_KEYWORDS", points=points, info=f"Found suspicious terms: {', '.join(found)}")]
+    return [Rule(name="SPAM_KEYWORDS", points=points, info=f"Found suspicious terms: {', '.join(found)}")]
 
 
-def score_punctuation(text: str) -> List[RuleResult]:
+def score_punctuation(text: str) -> List[Rule]:
     exclamations = text.count("!")
     if exclamations >= 5:
         points = min(15, exclamations)
-        return [RuleResult(name="EXCESSIVE_PUNCTUATION", points=points, info=f"Found {exclamations} exclamation marks")]
+        return [Rule(name="EXCESSIVE_PUNCTUATION", points=points, info=f"Found {exclamations} exclamation marks")]
     return []
 
 
-def score_all_caps_subject(subject: str) -> List[RuleResult]:
+def score_all_caps_subject(subject: str) -> List[Rule]:
     if subject and subject.isupper() and len(subject) > 5:
-        return [RuleResult(name="ALL_CAPS_SUBJECT", points=8, info="Subject is all capital letters")]
+        return [_ALL_CAPS_SUBJECT]
     return []
 
 
-def score_html_quality(html_body: str) -> List[RuleResult]:
+def score_html_quality(html_body: str) -> List[Rule]:
     if not html_body:
         return []
-    missing_doctype = "<!doctype" not in html_body.lower()
+    # The doctype check is case-insensitive, so no lowered copy of the HTML is built.
+    missing_doctype = DOCTYPE_REGEX.search(html_body) is None
+    # Two C-level str.count scans beat a single Python-level tag scanner by a wide margin.
     unmatched_tags = html_body.count("<div") != html_body.count("</div>")
     if missing_doctype or unmatched_tags:
         issues = []
@@ -105,7 +165,7 @@ def score_html_quality(html_body: str) -> List[RuleResult]:
             issues.append("missing doctype")
         if unmatched_tags:
             issues.append("unbalanced div tags")
-        return [RuleResult(name="POOR_HTML_STRUCTURE", points=7, info=", ".join(issues))]
+        return [Rule(name="POOR_HTML_STRUCTURE", points=7, info=", ".join(issues))]
     return []
 
 
@@ -113,78 +173,107 @@ def extract_urls(text: str) -> List[str]:
     return URL_REGEX.findall(text)
 
 
-def score_links(urls: List[str]) -> List[RuleResult]:
+def score_links(urls: List[str]) -> List[Rule]:
     if not urls:
         return []
-    suspicious = [u for u in urls if any(hint in u for hint in ["bit.ly", "tinyurl", "click" ])]
+    suspicious = [u for u in urls if any(hint in u for hint in SUSPICIOUS_URL_HINTS)]
     if suspicious:
-        return [RuleResult(name="SUSPICIOUS_URL", points=10, info=f"Found shortened/suspicious URLs: {', '.join(suspicious)}")]
+        return [Rule(name="SUSPICIOUS_URL", points=10, info=f"Found shortened/suspicious URLs: {', '.join(suspicious)}")]
     return []
 
 
 def domain_from_address(address: str) -> str:
-    if not address or "@" not in address:
+    at = address.rfind("@")
+    if at < 0:
         return ""
-    return address.split("@")[-1].lower().strip()
+    return address[at + 1 :].strip().lower()
 
 
-def check_headers(headers: Dict[str, str]) -> List[RuleResult]:
-    results: List[RuleResult] = []
-    spf = headers.get("Received-SPF", "").lower()
+def check_headers(headers: Dict[str, str]) -> List[Rule]:
+    results: List[Rule] = []
+    spf = headers.get("received-spf", "").lower()
     if "fail" in spf or "softfail" in spf:
-        results.append(RuleResult(name="SPF_FAIL", points=12, info="SPF validation failed"))
-    dkim = headers.get("DKIM-Signature") or headers.get("Dkim-Signature")
-    if not dkim:
-        results.append(RuleResult(name="NO_DKIM", points=15, info="Missing DKIM signature"))
-    dmarc = headers.get("Authentication-Results", "").lower()
+        results.append(_SPF_FAIL)
+    if not headers.get("dkim-signature"):
+        results.append(_NO_DKIM)
+    dmarc = headers.get("authentication-results", "").lower()
     if "dmarc=fail" in dmarc:
-        results.append(RuleResult(name="DMARC_FAIL", points=10, info="DMARC validation failed"))
+        results.append(_DMARC_FAIL)
     return results
 
 
-def check_disposable_domain(domain: str) -> List[RuleResult]:
+def check_disposable_domain(domain: str) -> List[Rule]:
     if domain in DISPOSABLE_DOMAINS:
-        return [RuleResult(name="DISPOSABLE_DOMAIN", points=10, info=f"Sender domain {domain} is disposable")]
+        return [Rule(name="DISPOSABLE_DOMAIN", points=10, info=f"Sender domain {domain} is disposable")]
     return []
 
 
 def simulate_domain_age(domain: str) -> int:
     if not domain:
         return 365
-    seed = sum(ord(c) for c in domain)
+    if domain.isascii():
+        # Summing the ASCII bytes gives the same seed without a per-character ord() call.
+        seed = sum(domain.encode("ascii"))
+    else:
+        seed = sum(ord(c) for c in domain)
     return (seed % 60) + 1
 
 
-def check_domain_age(domain: str) -> List[RuleResult]:
+def check_domain_age(domain: str) -> List[Rule]:
     age_days = simulate_domain_age(domain)
     if age_days <= 30:
-        return [RuleResult(name="NEW_DOMAIN", points=10, info=f"Domain registered {age_days} days ago")]
+        return [Rule(name="NEW_DOMAIN", points=10, info=f"Domain registered {age_days} days ago")]
     return []
 
 
-def dnsbl_lookup(domain: str) -> bool:
+_dnsbl_cache: TTLCache = TTLCache(maxsize=DNS_CACHE_SIZE, ttl=DNS_CACHE_TTL)
+_dnsbl_negative_cache: TTLCache = TTLCache(maxsize=DNS_CACHE_SIZE, ttl=DNS_NEGATIVE_CACHE_TTL)
+
+
+async def dnsbl_lookup(domain: str) -> bool:
+    if domain in _dnsbl_cache:
+        return _dnsbl_cache[domain]
+    if domain in _dnsbl_negative_cache:
+        return False
     try:
-        ip = socket.gethostbyname(domain)
+        answer = await dns.asyncresolver.resolve(domain, "A")
+    except (dns.resolver.NXDOMAIN, dns.resolver.NoAnswer):
+        # Non-existent names are remembered briefly so repeat senders skip the query.
+        _dnsbl_negative_cache[domain] = True
+        return False
     except Exception:
         return False
-    return ip in DNSBL_SAMPLE
+    listed = any(record.address in DNSBL_SAMPLE for record in answer)
+    _dnsbl_cache[domain] = listed
+    return listed
 
 
-def check_dnsbl(domain: str) -> List[RuleResult]:
-    if domain and dnsbl_lookup(domain):
-        return [RuleResult(name="DNSBL_LISTED", points=18, info=f"Domain {domain} is on a blocklist")]
+async def check_dnsbl(domain: str) -> List[Rule]:
+    if domain and await dnsbl_lookup(domain):
+        return [Rule(name="DNSBL_LISTED", points=18, info=f"Domain {domain} is on a blocklist")]
     return []
 
 
 def parse_headers(message) -> Dict[str, str]:
-    headers: Dict[str, str] = {}
-    for key, value in message.items():
-        headers[str(key)] = str(value)
-    return headers
+    # Keys are lowercased because header names are case-insensitive. Reading the
+    # stored (name, value) pairs skips building a header object per item; the
+    # raw values are only used for substring checks.
+    raw_headers = getattr(message, "_headers", None)
+    if raw_headers is None:
+        raw_headers = message.items()
+    return {str(key).lower(): str(value) for key, value in raw_headers}
 
 
 def validate_header_format(raw: str) -> None:
-    if HEADER_REGEX.search(raw) is None:
+    # A valid email has a header on its first line, so that line is checked with
+    # plain string operations; only if it fails is the rest searched with the regex.
+    end = raw.find("\n")
+    colon = raw.find(":", 0, len(raw) if end < 0 else end)
+    if colon > 0:
+        name = raw[:colon].replace("-", "").replace("_", "")
+        if not name or name.isalnum():
+            return
+    if end < 0 or HEADER_REGEX.search(raw, end + 1) is None:
         raise ValueError("Input does not look like valid email headers")
 
 
@@ -196,45 +285,74 @@ def categorize_score(score: int) -> str:
     return "LIKELY_SPAM"
 
 
-def analyze_email(raw: str) -> AnalysisResult:
+async def analyze_email(raw: Union[str, bytes]) -> AnalysisResult:
     if not raw.strip():
         raise ValueError("Email content is required")
 
     message = parse_email(raw)
     headers = parse_headers(message)
+    # Fetched once: each message.get() scans the header list and decodes the value.
+    subject = message.get("Subject", "")
+    sender = message.get("From", "")
 
     plain_body, html_body = extract_body(message)
-    body_text = "\n".join([message.get("Subject", ""), plain_body, html_body])
+    body_text = "\n".join([subject, plain_body, html_body])
 
-    sender = message.get("From", "")
     sender_domain = domain_from_address(sender)
 
     links = extract_urls(body_text)
 
-    rules: List[RuleResult] = []
-    rules.extend(score_keywords(body_text))
-    rules.extend(score_punctuation(body_text))
-    rules.extend(score_all_caps_subject(message.get("Subject", "")))
-    rules.extend(score_html_quality(html_body))
-    rules.extend(score_links(links))
-    rules.extend(check_headers(headers))
-    rules.extend(check_disposable_domain(sender_domain))
-    rules.extend(check_domain_age(sender_domain))
-    rules.extend(check_dnsbl(sender_domain))
+    header_rules = check_headers(headers)
+    rules: List[Rule] = [
+        *score_keywords(body_text),
+        *score_punctuation(body_text),
+        *score_all_caps_subject(subject),
+        *score_html_quality(html_body),
+        *score_links(links),
+        *header_rules,
+        *check_disposable_domain(sender_domain),
+        *check_domain_age(sender_domain),
+        *await check_dnsbl(sender_domain),
+    ]
 
     total = min(sum(rule.points for rule in rules), 100)
     category = categorize_score(total)
 
+    # Only check_headers can produce the header failures, so its rules are all we need to inspect.
+    failed_headers = {rule.name for rule in header_rules}
     header_status = {
-        "spf": "fail" if any(r.name == "SPF_FAIL" for r in rules) else "pass",
-        "dkim": "missing" if any(r.name == "NO_DKIM" for r in rules) else "pass",
-        "dmarc": "fail" if any(r.name == "DMARC_FAIL" for r in rules) else "pass",
+        "spf": "fail" if "SPF_FAIL" in failed_headers else "pass",
+        "dkim": "missing" if "NO_DKIM" in failed_headers else "pass",
+        "dmarc": "fail" if "DMARC_FAIL" in failed_headers else "pass",
     }
 
-    return AnalysisResult(
+    # Every field is built above from trusted values, so pydantic validation is skipped.
+    return AnalysisResult.construct(
         score=total,
         category=category,
-        rules_triggered=rules,
+        rules_triggered=[RuleResult.construct(**rule._asdict()) for rule in rules],
         links=links,
         headers=header_status,
     )
+
+
+async def analyze_batch(raws: List[Union[str, bytes]]) -> List[BatchItem]:
+    if len(raws) > MAX_BATCH_SIZE:
+        raise ValueError(f"A batch may contain at most {MAX_BATCH_SIZE} emails")
+
+    # Emails are scored concurrently so their DNSBL lookups overlap, but never
+    # more than BATCH_CONCURRENCY at a time.
+    semaphore = asyncio.Semaphore(BATCH_CONCURRENCY)
+
+    async def analyze_item(index: int, raw: Union[str, bytes]) -> BatchItem:
+        async with semaphore:
+            try:
+                result = await analyze_email(raw)
+            except ValueError as exc:
+                return BatchItem.construct(index=index, result=None, error=str(exc))
+            except Exception:
+                # Mirrors the single /analyze route: one undecodable email must not fail the batch.
+                return BatchItem.construct(index=index, result=None, error="Analysis failed")
+        return BatchItem.construct(index=index, result=result, error=None)
+
+    return list(await asyncio.gather(*(analyze_item(index, raw) for index, raw in enumerate(raws))))
@@ -1,15 +1,22 @@
+from typing import List
+
 from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse
 from pydantic import BaseModel
 
-from .analyzer import AnalysisResult, analyze_email
+from .analyzer import AnalysisResult, BatchItem, analyze_batch, analyze_email
 
 
 class AnalyzeRequest(BaseModel):
     raw: str
 
 
-app = FastAPI(title="Email Spam Score Checker")
+class AnalyzeBatchRequest(BaseModel):
+    raws: List[str]
+
+
+app = FastAPI(title="Email Spam Score Checker", default_response_class=ORJSONResponse)
 
 app.add_middleware(
     CORSMiddleware,
@@ -23,12 +30,24 @@ app.add_middleware(
 @app.post("/analyze", response_model=AnalysisResult)
 async def analyze(request: AnalyzeRequest):
     try:
-        result = analyze_email(request.raw)
+        result = await analyze_email(request.raw)
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc)) from exc
+    except Exception as exc:  # pragma: no cover - unexpected errors
+        raise HTTPException(status_code=500, detail="Analysis failed") from exc
+    # Returning a response directly skips re-validating the already-built model.
+    return ORJSONResponse(content=result.dict())
+
+
+@app.post("/analyze/batch", response_model=List[BatchItem])
+async def analyze_many(request: AnalyzeBatchRequest):
+    try:
+        items = await analyze_batch(request.raws)
     except ValueError as exc:
         raise HTTPException(status_code=400, detail=str(exc)) from exc
     except Exception as exc:  # pragma: no cover - unexpected errors
         raise HTTPException(status_code=500, detail="Analysis failed") from exc
-    return result
+    return ORJSONResponse(content=[item.dict() for item in items])
 
 
 @app.get("/health")
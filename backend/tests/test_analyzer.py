@@ -1,3 +1,5 @@
+import asyncio
+
 import pytest
 
 from app import analyzer
@@ -7,7 +9,7 @@ SAMPLE_EMAIL = """From: spammer@mailinator.com\nSubject: WINNER WINNER\n\nClaim
 
 
 def test_analyze_email_returns_score_and_category():
-    result = analyzer.analyze_email(SAMPLE_EMAIL)
+    result = asyncio.run(analyzer.analyze_email(SAMPLE_EMAIL))
     assert result.score > 0
     assert result.category in {"SAFE", "SUSPICIOUS", "LIKELY_SPAM"}
     assert any(rule.name == "SPAM_KEYWORDS" for rule in result.rules_triggered)
@@ -15,7 +17,7 @@ def test_analyze_email_returns_score_and_category():
 
 def test_empty_email_raises_value_error():
     with pytest.raises(ValueError):
-        analyzer.analyze_email("")
+        asyncio.run(analyzer.analyze_email(""))
 
 
 def test_header_validation_rejects_invalid_headers():
@@ -35,3 +37,135 @@ def test_suspicious_links_detected():
     urls = analyzer.extract_urls(SAMPLE_EMAIL)
     link_rules = analyzer.score_links(urls)
     assert link_rules
+
+
+def test_keyword_scoring_reports_terms_in_keyword_order():
+    rules = analyzer.score_keywords("Huge WINNER at the Casino, claim now!")
+    assert rules[0].points == 16
+    assert rules[0].info == "Found suspicious terms: casino, claim now, winner"
+
+
+def test_parse_email_reuses_parsed_message_for_same_input():
+    assert analyzer.parse_email(SAMPLE_EMAIL) is analyzer.parse_email(SAMPLE_EMAIL)
+
+
+def test_extract_body_collects_plain_and_html_parts():
+    raw = (
+        "From: a@example.com\nSubject: Hi\nMIME-Version: 1.0\n"
+        'Content-Type: multipart/alternative; boundary="b"\n\n'
+        "--b\nContent-Type: text/plain\n\nplain text\n"
+        "--b\nContent-Type: text/html\n\n<p>html</p>\n"
+        "--b\nContent-Type: image/png\n\nnot text\n"
+        "--b--\n"
+    )
+    plain, html = analyzer.extract_body(analyzer.parse_email(raw))
+    assert plain.strip() == "plain text"
+    assert html.strip() == "<p>html</p>"
+
+
+def test_dnsbl_lookup_caches_missing_domains(monkeypatch):
+    calls = []
+
+    async def fake_resolve(domain, rdtype):
+        calls.append(domain)
+        raise analyzer.dns.resolver.NXDOMAIN()
+
+    monkeypatch.setattr(analyzer.dns.asyncresolver, "resolve", fake_resolve)
+    domain = "unlisted-cache-test.example"
+    assert asyncio.run(analyzer.dnsbl_lookup(domain)) is False
+    assert asyncio.run(analyzer.dnsbl_lookup(domain)) is False
+    assert calls == [domain]
+
+
+def test_analyze_batch_matches_single_analysis():
+    legit = "From: alice@example.com\nSubject: Lunch\n\nSee you at noon.\n"
+    items = asyncio.run(analyzer.analyze_batch([SAMPLE_EMAIL, legit]))
+    assert [item.result.score for item in items] == [
+        asyncio.run(analyzer.analyze_email(SAMPLE_EMAIL)).score,
+        asyncio.run(analyzer.analyze_email(legit)).score,
+    ]
+
+
+def test_analyze_batch_reports_invalid_items_by_index():
+    items = asyncio.run(analyzer.analyze_batch([SAMPLE_EMAIL, ""]))
+    assert items[0].error is None
+    assert (items[1].index, items[1].result, items[1].error) == (1, None, "Email content is required")
+
+
+BOGUS_CHARSET_EMAIL = "From: a@example.com\nSubject: Hi\nContent-Type: text/plain; charset=x-bogus\n\nhello\n"
+
+
+def test_analyze_batch_reports_undecodable_items_by_index():
+    items = asyncio.run(analyzer.analyze_batch([SAMPLE_EMAIL, BOGUS_CHARSET_EMAIL]))
+    assert items[0].result.score > 0
+    assert (items[1].index, items[1].result, items[1].error) == (1, None, "Analysis failed")
+
+
+def test_analyze_batch_rejects_oversized_batches():
+    with pytest.raises(ValueError):
+        asyncio.run(analyzer.analyze_batch([SAMPLE_EMAIL] * (analyzer.MAX_BATCH_SIZE + 1)))
+
+
+def test_analyze_email_accepts_raw_bytes():
+    from_bytes = asyncio.run(analyzer.analyze_email(SAMPLE_EMAIL.encode()))
+    from_str = asyncio.run(analyzer.analyze_email(SAMPLE_EMAIL))
+    assert from_bytes == from_str
+
+
+def test_keyword_scoring_handles_non_ascii_text():
+    rules = analyzer.score_keywords("Grüße an den WINNER der LOTTERY – jetzt!")
+    assert rules[0].info == "Found suspicious terms: lottery, winner"
+    # KELVIN SIGN lowercases to an ASCII "k".
+    rules = analyzer.score_keywords("Ma\u212Ae money fast")
+    assert rules[0].info == "Found suspicious terms: make money fast"
+
+
+def test_header_checks_ignore_header_name_case():
+    message = analyzer.parse_email(
+        "From: a@example.com\ndkim-signature: v=1\nRECEIVED-SPF: softfail\n\nHi\n"
+    )
+    names = [rule.name for rule in analyzer.check_headers(analyzer.parse_headers(message))]
+    assert names == ["SPF_FAIL"]
+
+
+@pytest.mark.parametrize(
+    "score, category",
+    [(-5, "SAFE"), (0, "SAFE"), (30, "SAFE"), (31, "SUSPICIOUS"), (60, "SUSPICIOUS"), (61, "LIKELY_SPAM"), (100, "LIKELY_SPAM"), (150, "LIKELY_SPAM")],
+)
+def test_categorize_score_thresholds(score, category):
+    assert analyzer.categorize_score(score) == category
+
+
+def test_html_quality_flags_missing_doctype_and_unbalanced_divs():
+    assert analyzer.score_html_quality("<!DocType html><div><div></div></div>") == []
+    rules = analyzer.score_html_quality("<html><div><div></div></html>")
+    assert rules[0].info == "missing doctype, unbalanced div tags"
+
+
+def test_header_validation_accepts_header_on_any_line():
+    analyzer.validate_header_format("From: a@example.com\n\nBody")
+    analyzer.validate_header_format("preamble line\nX-Mailer_Id: 1\n")
+
+
+def test_extract_urls_stops_at_unicode_whitespace():
+    assert analyzer.extract_urls("see http://bit.ly/x\xa0now or https://a.example/y　z") == [
+        "http://bit.ly/x",
+        "https://a.example/y",
+    ]
+
+
+def test_parse_email_does_not_cache_large_input():
+    raw = "From: a@example.com\nSubject: Big\n\n" + "x" * (analyzer.PARSE_CACHE_MAX_RAW_LENGTH + 1)
+    assert analyzer.parse_email(raw) is not analyzer.parse_email(raw)
+
+
+def test_extract_body_caps_collected_text():
+    raw = "From: a@example.com\nSubject: Big\n\n" + "x" * (analyzer.MAX_BODY_CHARS * 3)
+    plain, html = analyzer.extract_body(analyzer.parse_email(raw))
+    assert len(plain) == analyzer.MAX_BODY_CHARS
+    assert html == ""
+
+
+def test_parse_email_reports_unencodable_input_as_parse_failure():
+    with pytest.raises(ValueError, match="^Failed to parse email"):
+        analyzer.parse_email("From: a@example.com\n\n\ud800")
@@ -0,0 +1,38 @@
+from fastapi.testclient import TestClient
+
+from app import analyzer
+from app.main import app
+
+client = TestClient(app)
+
+SAMPLE_EMAIL = "From: spammer@mailinator.com\nSubject: WINNER WINNER\n\nClaim now for free money!!!\n"
+
+
+def test_analyze_batch_route_returns_result_per_email():
+    response = client.post("/analyze/batch", json={"raws": [SAMPLE_EMAIL, SAMPLE_EMAIL]})
+    assert response.status_code == 200
+    body = response.json()
+    assert [item["index"] for item in body] == [0, 1]
+    assert all(item["error"] is None and item["result"]["score"] > 0 for item in body)
+
+
+def test_analyze_batch_route_reports_bad_item():
+    response = client.post("/analyze/batch", json={"raws": [SAMPLE_EMAIL, ""]})
+    assert response.status_code == 200
+    body = response.json()
+    assert body[0]["result"]["category"] in {"SAFE", "SUSPICIOUS", "LIKELY_SPAM"}
+    assert body[1] == {"index": 1, "result": None, "error": "Email content is required"}
+
+
+def test_analyze_batch_route_rejects_oversized_batch():
+    response = client.post("/analyze/batch", json={"raws": [SAMPLE_EMAIL] * (analyzer.MAX_BATCH_SIZE + 1)})
+    assert response.status_code == 400
+
+
+def test_analyze_batch_route_reports_undecodable_item():
+    bogus = "From: a@example.com\nSubject: Hi\nContent-Type: text/plain; charset=x-bogus\n\nhello\n"
+    response = client.post("/analyze/batch", json={"raws": [SAMPLE_EMAIL, bogus]})
+    assert response.status_code == 200
+    body = response.json()
+    assert body[0]["error"] is None
+    assert body[1] == {"index": 1, "result": None, "error": "Analysis failed"}